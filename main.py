@@ -15,7 +15,7 @@ ctk.set_default_color_theme("blue")
 if __name__ == "__main__":
     def signal_handler(sig, _):
         print(f"Caught signal {sig}, exiting.")
-        app.quit()
+        app.on_close()
         sys.exit(0)
 
     args = parse_args()
@@ -2,15 +2,14 @@ import os
 import sys
 import argparse
 import logging
-import git
+import functools
 
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
+# PyInstaller unpacks bundled files to sys._MEIPASS
+FROZEN = hasattr(sys, '_MEIPASS')
+BASE_PATH = sys._MEIPASS if FROZEN else os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path)
+def resource_path(relative_path):
+    return os.path.join(BASE_PATH, relative_path)
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Simple NETCONF Client")
@@ -26,6 +25,7 @@ def setup_logging(debug_enabled):
     logging.basicConfig(level=logging_level, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def generate_version_file():
+    import git
     r = git.repo.Repo(search_parent_directories=True)
     version_info = r.git.describe('--dirty', '--tags')
     with open(resource_path('version.txt'), 'w') as f:
@@ -33,6 +33,7 @@ def generate_version_file():
         f.write('\n')
         f.close()
 
+@functools.lru_cache(maxsize=None)
 def get_version(should_regenerate_version_txt=False):
     try:
         # Deletes current version.txt file
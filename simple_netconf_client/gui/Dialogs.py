@@ -1,15 +1,54 @@
-import markdown
+import functools
 import customtkinter as ctk
-from tkinterweb import HtmlFrame
 from tkinter import  END, Listbox
 from simple_netconf_client import get_version
 
+_CSS_DARK = """
+body { font-family: Arial, sans-serif; }
+pre { background-color: #2e2e2e; color: #f8f8f2; padding: 10px; }
+code { background-color: #2e2e2e; color: #f8f8f2; }
+body { background-color: #1e1e1e; color: #f8f8f2; }
+a { color: #1e90ff; text-decoration: underline; }
+blockquote { border-left: 4px solid #1e90ff; padding-left: 10px; margin-left: 0; color: #888; }
+"""
+_CSS_LIGHT = """
+body { font-family: Arial, sans-serif; }
+pre { background-color: #f8f8f2; color: #2e2e2e; padding: 10px; }
+code { background-color: #f8f8f2; color: #2e2e2e; }
+body { background-color: #ffffff; color: #000000; }
+a { color: #0000ff; text-decoration: underline; }
+blockquote { border-left: 4px solid #0000ff; padding-left: 10px; margin-left: 0; color: #555; }
+"""
+_HTML_TMPL = """
+<html>
+<head>
+    <style>{css}</style>
+</head>
+<body>
+    {body}
+</body>
+</html>
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _markdown():
+    """Markdown converter, extensions are set up once, on first use"""
+    import markdown
+    return markdown.Markdown(extensions=['fenced_code', 'codehilite', 'extra'])
+
+
+@functools.lru_cache(maxsize=32)
+def _render_markdown(content, dark):
+    """Render Markdown to a complete HTML page, cached since help text is static"""
+    css = _CSS_DARK if dark else _CSS_LIGHT
+    return _HTML_TMPL.format(css=css, body=_markdown().reset().convert(content))
+
 
 class AboutDialog(ctk.CTkToplevel):
     def __init__(self, parent, width, height):
         super().__init__(parent)
         self.title("About")
-        parent.center_dialog(self, width, height)
         about_message = (
             "Simple NETCONF Client\n"
             f"{get_version()}\n"
@@ -30,6 +69,9 @@ class AboutDialog(ctk.CTkToplevel):
         # Bring frame into foreground and focus it when it becomes visible
         self.bind("<Map>", self.on_map)
 
+        # Center when all widgets are in place
+        parent.center_dialog(self, width, height)
+
     def on_map(self, event):
         self.lift()
         self.focus_force()
@@ -38,7 +80,6 @@ class LicenseDialog(ctk.CTkToplevel):
     def __init__(self, parent, width, height):
         super().__init__(parent)
         self.title("License")
-        parent.center_dialog(self, width, height)
         license_message = (
             "MIT License\n\n"
             "Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the 'Software'), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:\n\n"
@@ -58,6 +99,9 @@ class LicenseDialog(ctk.CTkToplevel):
         # Bring frame into foreground and focus it when it becomes visible
         self.bind("<Map>", self.on_map)
 
+        # Center when all widgets are in place
+        parent.center_dialog(self, width, height)
+
     def on_map(self, event):
         self.lift()
         self.focus_force()
@@ -65,46 +109,24 @@ class LicenseDialog(ctk.CTkToplevel):
 
 class UsageDialog(ctk.CTkToplevel):
     def __init__(self, parent, content, width=800, height=600):
+        from tkinterweb import HtmlFrame
         super().__init__(parent)
         self.parent = parent
 
         self.title("Usage")
-        parent.center_dialog(self, width, height)
 
         # Initialize history tracking
         self.history = []
         self.history_index = -1
+        # Last state set on navigation buttons, only update on change
+        self.back_state = "disabled"
+        self.forward_state = "disabled"
 
-        # Apply dark mode CSS if needed
-        css = """
-        body { font-family: Arial, sans-serif; }
-        pre { background-color: #2e2e2e; color: #f8f8f2; padding: 10px; }
-        code { background-color: #2e2e2e; color: #f8f8f2; }
-        body { background-color: #1e1e1e; color: #f8f8f2; }
-        a { color: #1e90ff; text-decoration: underline; }
-        blockquote { border-left: 4px solid #1e90ff; padding-left: 10px; margin-left: 0; color: #888; }
-        """ if ctk.get_appearance_mode() == "Dark" else """
-        body { font-family: Arial, sans-serif; }
-        pre { background-color: #f8f8f2; color: #2e2e2e; padding: 10px; }
-        code { background-color: #f8f8f2; color: #2e2e2e; }
-        body { background-color: #ffffff; color: #000000; }
-        a { color: #0000ff; text-decoration: underline; }
-        blockquote { border-left: 4px solid #0000ff; padding-left: 10px; margin-left: 0; color: #555; }
-        """
-
-        self.html_content = f"""
-        <html>
-        <head>
-            <style>{css}</style>
-        </head>
-        <body>
-            {markdown.markdown(content, extensions=['fenced_code', 'codehilite', 'extra'])}
-        </body>
-        </html>
-        """
+        self.html_content = _render_markdown(content, ctk.get_appearance_mode() == "Dark")
 
         self.html_frame = HtmlFrame(self, horizontal_scrollbar="auto", messages_enabled=False)
         self.html_frame.load_html(self.html_content)
+        self.current_content = self.html_content
         self.html_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Back and Forward buttons
@@ -150,6 +172,9 @@ class UsageDialog(ctk.CTkToplevel):
 
         # Bring frame into foreground and focus it when it becomes visible
         self.html_frame.bind("<Map>", self.on_map)
+
+        # Center when all widgets are in place
+        parent.center_dialog(self, width, height)
     
     def override_default_tab_behaviour(self, event):
         return 'break'
@@ -162,44 +187,54 @@ class UsageDialog(ctk.CTkToplevel):
         return
 
     def add_to_history(self, content, is_url):
-        if self.history_index == -1 or (self.history and self.history[self.history_index] != content):
-            self.history = self.history[:self.history_index + 1]
+        if self.history_index == -1 or (self.history and self.history[self.history_index][0] != content):
+            del self.history[self.history_index + 1:]
             self.history.append((content, is_url))
             self.history_index += 1
 
         self.update_navigation_buttons()
 
-    def load_html_content(self, content):
-        if content.startswith("http://") or content.startswith("https://"):
+    def display(self, content, is_url):
+        """Load URL or HTML, unless already shown, to skip a full re-layout"""
+        if content == self.current_content:
+            return
+        self.current_content = content
+        if is_url:
             self.html_frame.load_url(content)
-            self.add_to_history(content, is_url=True)
         else:
             self.html_frame.load_html(content)
-            self.add_to_history(content, is_url=False)
+
+    def load_html_content(self, content):
+        if content == self.current_content:
+            return
+        is_url = content.startswith("http://") or content.startswith("https://")
+        self.display(content, is_url)
+        self.add_to_history(content, is_url)
 
     def go_back(self):
         if self.history_index > 0:
             self.history_index -= 1
             content, is_url = self.history[self.history_index]
-            if is_url:
-                self.html_frame.load_url(content)
-            else:
-                self.html_frame.load_html(content)
+            self.display(content, is_url)
         self.update_navigation_buttons()
 
     def go_forward(self):
         if self.history_index < len(self.history) - 1:
             self.history_index += 1
             content, is_url = self.history[self.history_index]
-            if is_url:
-                self.html_frame.load_url(content)
-            else:
-                self.html_frame.load_html(content)
+            self.display(content, is_url)
         self.update_navigation_buttons()
 
     def update_navigation_buttons(self):
-        self.back_button.configure(state="normal" if self.history_index > 0 else "disabled")
-        self.forward_button.configure(state="normal" if self.history_index < len(self.history) - 1 else "disabled")
+        back_state = "normal" if self.history_index > 0 else "disabled"
+        forward_state = "normal" if self.history_index < len(self.history) - 1 else "disabled"
+
+        if back_state != self.back_state:
+            self.back_button.configure(state=back_state)
+            self.back_state = back_state
+        if forward_state != self.forward_state:
+            self.forward_button.configure(state=forward_state)
+            self.forward_state = forward_state
 
     def on_back_button(self, event):
         self.go_back()
@@ -246,9 +281,8 @@ class ScanResultsDialog(ctk.CTkToplevel):
 
     def update_listbox(self):
         self.listbox.delete(0, END)
-        for name, ip, port in self.devices:
-            name = name.rstrip('.')
-            self.listbox.insert('end', f"{name} - {ip}:{port}")
+        self.listbox.insert(END, *[f"{name} - {ip}:{port}"
+                                   for name, ip, port in self.devices])
 
     def on_ok(self):
         selection = self.listbox.curselection()
@@ -1,33 +1,32 @@
 import re
+import io
 import os
-import sys
+import copy
 import logging
 import subprocess
 import functools
 import platform
-import http.server
-import socketserver
 import socket
 import threading
+import concurrent.futures
 import psutil
 import customtkinter as ctk
 import datetime
 from tkinter import Menu, END, filedialog, messagebox, Toplevel, TclError
 import tkinter as tk
 from PIL import Image, ImageTk
+from lxml import etree
 from lxml.etree import XMLSyntaxError, DocumentInvalid
-from tkinterweb import HtmlFrame
-from ncclient.xml_ import to_ele
-from zeroconf import ServiceBrowser, Zeroconf
-from xml.dom.minidom import parseString
-from simple_netconf_client import resource_path
+from simple_netconf_client import resource_path, FROZEN
 from simple_netconf_client.gui.Dialogs import LicenseDialog, UsageDialog, AboutDialog, ScanResultsDialog
-from simple_netconf_client.network.Netconf import ConfigManager, ZeroconfListener, NetconfConnection
+from simple_netconf_client.network.Netconf import ConfigManager, ZeroconfListener, NetconfConnection, NetconfSessionPool, NETCONF_SVC
 from pygments import lex
-from pygments.lexers.html import XmlLexer
 from pygments.styles import get_all_styles, get_style_by_name
 import time
 
+if platform.system() == "Windows":
+    import winreg
+
 APP_TITLE = "Simple NETCONF Client"
 WELCOME = "Welcome to the NETCONF client!\n\n" \
     "Please use the buttons on the left to initiate commands.\n" \
@@ -48,10 +47,6 @@ WELCOME = "Welcome to the NETCONF client!\n\n" \
 
 RPC_SYSTEM_RESTART = """<system-restart xmlns="urn:ietf:params:xml:ns:yang:ietf-system"/>"""
 RPC_FACTORY_RESET = """<factory-reset xmlns="urn:ietf:params:xml:ns:yang:ietf-factory-default"/>"""
-RPC_SET_DATETIME = f"""<set-current-datetime xmlns="urn:ietf:params:xml:ns:yang:ietf-system">
-    <current-datetime>{datetime.datetime.now().astimezone().replace(microsecond=0).isoformat()}</current-datetime>
-</set-current-datetime>
-"""
 RPC_GET_OPER = """<get-data xmlns="urn:ietf:params:xml:ns:yang:ietf-netconf-nmda"
           xmlns:ds="urn:ietf:params:xml:ns:yang:ietf-datastores">
     <datastore>ds:operational</datastore>
@@ -61,13 +56,194 @@ RPC_GET_OPER = """<get-data xmlns="urn:ietf:params:xml:ns:yang:ietf-netconf-nmda
     </subtree-filter>
 </get-data>
 """
+XML_INDENT = "    "  # 4 spaces
+TEXT_RANGE = ("1.0", "end-1c")  # text box contents, without Tk's trailing newline
+SAVE_BLOCK_LINES = 4096  # lines per write when saving the text box
+IFACE_CACHE_TTL = 2.0  # seconds, interface list is reused within this time
+IFACE_RE = re.compile(r"(.+)\s+\(([\d.]+)\)$")  # "eth0 (192.168.1.1)"
+ALPHA_MASK_LUT = [0] + [255] * 255  # any alpha > 0 becomes fully opaque
+PROFINET_FILES = {
+    'Enable': "enable-profinet.xml",
+    'Disable': "disable-profinet.xml",
+}
+ICON_FILES = {
+    'save': "icons/save.png",
+    'load': "icons/open.png",
+    'exit': "icons/close.png",
+    'tran': "icons/transparent.png",
+}
+
+
+def rpc_set_datetime():
+    """Set device clock to the current local time, including UTC offset"""
+    now = datetime.datetime.now().astimezone().replace(microsecond=0)
+    return f"""<set-current-datetime xmlns="urn:ietf:params:xml:ns:yang:ietf-system">
+    <current-datetime>{now.isoformat()}</current-datetime>
+</set-current-datetime>
+"""
+
+
+@functools.lru_cache(maxsize=32)
+def _read_text(path, mtime):
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def read_text(path):
+    """Read static file, cached until it is modified on disk
+
+    Files unpacked from a PyInstaller bundle never change, no need to stat."""
+    return _read_text(path, 0 if FROZEN else os.path.getmtime(path))
+
+
+# Shared parser, indentation in RPCs typed by the user is not sent on the
+# wire, and large configs pasted for edit-config are not size limited
+XML_PARSER = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+
+
+def _gsettings_theme(schema, key):
+    result = subprocess.run(['gsettings', 'get', schema, key],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    theme = result.stdout.strip().strip("'")
+    return "Dark" if 'dark' in theme.lower() else "Light"
+
+
+@functools.lru_cache(maxsize=1)
+def get_system_theme():
+    """Desktop light/dark preference, queried once per run
+
+    Selecting System in the Settings menu queries it again, see
+    change_theme_mode_event()."""
+    system = platform.system()
+    try:
+        if system == "Windows":
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                                 r'Software\Microsoft\Windows\CurrentVersion\Themes\Personalize')
+            value, _ = winreg.QueryValueEx(key, 'AppsUseLightTheme')
+            return "Dark" if value == 0 else "Light"
+
+        if system == "Darwin":
+            # Key only exists when dark mode is enabled
+            result = subprocess.run(['defaults', 'read', '-g', 'AppleInterfaceStyle'],
+                                    capture_output=True, text=True)
+            return "Dark" if result.returncode == 0 else "Light"
+
+        # Linux Mint (Cinnamon) has its own schema, everyone else Gnome's
+        if 'cinnamon' in os.environ.get('XDG_CURRENT_DESKTOP', '').lower():
+            theme = _gsettings_theme('org.cinnamon.desktop.interface', 'gtk-theme')
+        else:
+            theme = _gsettings_theme('org.gnome.desktop.interface', 'color-scheme')
+        if theme:
+            return theme
+    except Exception:
+        pass
+
+    # Fallback to Ctk detected system
+    return "System"
+
+
+@functools.lru_cache(maxsize=1)
+def xml_lexer():
+    """Syntax highlighting lexer, created on first use
+
+    Its module, pygments.lexers.html, also loads the CSS and JavaScript
+    lexers, keep that out of the time to first window."""
+    from pygments.lexers.html import XmlLexer
+    return XmlLexer()
+
+
+def to_ele(xml):
+    """Parse XML string to an element, like ncclient.xml_.to_ele()"""
+    return etree.fromstring(xml.encode(), XML_PARSER)
+
+
+# Static RPCs are parsed once, keyed on their text as shown in the textbox
+CANNED_RPCS = {rpc.strip(): to_ele(rpc) for rpc in (RPC_SYSTEM_RESTART,
+                                                     RPC_FACTORY_RESET,
+                                                     RPC_GET_OPER)}
+
+
+# Upgrade RPC skeleton, <url> is filled in by rpc_install_bundle()
+INSTALL_BUNDLE = to_ele("""<install-bundle xmlns="urn:infix:system:ns:yang:1.0">
+    <url/>
+</install-bundle>""")
+
+
+def rpc_install_bundle(url):
+    """Upgrade RPC text for url, any XML special characters are escaped"""
+    rpc = copy.deepcopy(INSTALL_BUNDLE)
+    rpc[0].text = url
+    etree.indent(rpc, space=XML_INDENT)
+    return etree.tostring(rpc, encoding="unicode") + "\n"
+
+
+def rpc_ele(xml):
+    """Element for RPC text, reusing the pre-parsed static RPCs
+
+    Other RPCs, e.g. edited by the user, are parsed as-is and not kept."""
+    xml = xml.strip()
+    ele = CANNED_RPCS.get(xml)
+    if ele is None:
+        return to_ele(xml)
+    # Copy, ncclient moves the element into its <rpc> wrapper
+    return copy.deepcopy(ele)
+
+
+def pretty_subtree(elem):
+    """Detach element from its tree and pretty-print it
+
+    Detaching frees the subtree from the document, and drops xmlns:nc et al,
+    inherited from the <rpc-reply>, unless used in the subtree."""
+    elem.getparent().remove(elem)
+    etree.cleanup_namespaces(elem)
+    etree.indent(elem, space=XML_INDENT)
+    return etree.tostring(elem, encoding="unicode", with_tail=False)
+
+
+def pretty_reply(response):
+    """Pretty-print an RPC reply, its <data> if already parsed by ncclient"""
+    root = getattr(response, "data_ele", None)
+    if root is None:
+        root = to_ele(response.xml)
+    etree.indent(root, space=XML_INDENT)
+    return etree.tostring(root, encoding="unicode")
+
+
+def iter_xml_data(xml):
+    """Parse RPC reply incrementally, yield each child of <data> pretty-printed"""
+    data = None
+    events = etree.iterparse(io.BytesIO(xml.encode()), events=("start", "end"),
+                             remove_blank_text=True, huge_tree=True)
+    for event, elem in events:
+        if event == "start":
+            if data is None and etree.QName(elem).localname == "data":
+                data = elem
+            continue
+
+        if data is not None and elem.getparent() is data:
+            yield pretty_subtree(elem)
+
+    if data is None:
+        raise ValueError("no <data> element in reply")
+
 
 class SimpleNetconfClient(ctk.CTk):
     def __init__(self):
-        self.cfg_mgr = ConfigManager()
+        self.cfg_mgr = ConfigManager(app=self)
         self.cfg = self.cfg_mgr.cfg
         self.devices = []
         self.debouncer_id = None
+        self.zeroconf = None
+        self.server = None
+        # Runs the file server's serve_forever(), reused across restarts
+        self.server_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="httpd")
+        # NETCONF sessions are run in the background, see run_rpc()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Sessions are kept open and reused by RPCs until idle too long
+        self.pool = NetconfSessionPool(self, self.cfg['pool_idle_timeout'])
         super().__init__()
 
         self.title(APP_TITLE)
@@ -100,7 +276,7 @@ class SimpleNetconfClient(ctk.CTk):
             )
 
         self.settings_menu.add_radiobutton(label="System", variable=self.theme_var,
-                                           command=lambda: self.change_theme_mode_event("System"))
+                                           command=lambda: self.change_theme_mode_event("System", refresh=True))
         self.settings_menu.add_radiobutton(label="Light", variable=self.theme_var,
                                            command=lambda: self.change_theme_mode_event("Light"))
         self.settings_menu.add_radiobutton(label="Dark", variable=self.theme_var,
@@ -121,34 +297,32 @@ class SimpleNetconfClient(ctk.CTk):
         self.file_menu.add_command(label="Open", underline=0,
                                    accelerator="Ctrl+O",
                                    command=self.open_file,
-                                   image=self.load_icon, compound="left")
+                                   compound="left")
         self.file_menu.add_command(label="Save", underline=0,
                                    accelerator="Ctrl+S",
                                    command=self.save_file,
-                                   image=self.save_icon, compound="left")
+                                   compound="left")
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Exit", underline=0,
                                    accelerator="Ctrl+Q",
-                                   command=self.quit,
-                                   image=self.exit_icon, compound="left")
+                                   command=self.on_close,
+                                   compound="left")
 
         self.help_menu.add_command(label="Usage", underline=0,
                                    accelerator="Ctrl+H",
                                    command=self.show_usage,
-                                   image=self.transparent_icon,
                                    compound="left")
         self.help_menu.add_command(label="License", command=self.show_license,
-                                   image=self.transparent_icon,
                                    compound="left")
         self.help_menu.add_command(label="About", command=self.show_about,
-                                   image=self.transparent_icon,
                                    compound="left")
 
         self.menubar.add_cascade(label="File", underline=0, menu=self.file_menu)
         self.menubar.add_cascade(label="Settings", underline=0, menu=self.settings_menu)
         self.menubar.add_cascade(label="Help", underline=0, menu=self.help_menu)
 
-        self.update_menu_icons()
+        # Menu icons are decoded and attached once the window is up
+        self.after_idle(self.attach_menu_icons)
 
         # left sidebar with netconf RPCs ######################################
         self.sidebar_frame = ctk.CTkFrame(self, width=100, corner_radius=0)
@@ -205,6 +379,7 @@ class SimpleNetconfClient(ctk.CTk):
                                    padx=10, pady=(10, 0))
 
         self.target = "running"
+        self.time_rpc = None  # set-time RPC as shown, see time_set_cb()
         self.put_config = ctk.CTkOptionMenu(self.cp,
                                             command=self.put_config_cb,
                                             width=98,
@@ -251,6 +426,9 @@ class SimpleNetconfClient(ctk.CTk):
         self.send_button.grid(row=3, column=2, padx=(20, 0), pady=(20, 20),
                               sticky="nsew")
 
+        # Disabled while an RPC is in flight, see run_rpc()
+        self.rpc_buttons = (self.send_button, self.get_config_button, self.save)
+
         # right sidebar with settings #########################################
         self.tabview = ctk.CTkTabview(self, width=230, height=300)
         self.tabview.grid(row=0, column=3, rowspan=8, padx=(10, 0), pady=(0, 0), sticky="nsew")
@@ -365,6 +543,8 @@ class SimpleNetconfClient(ctk.CTk):
                                          font=("Arial", 8))
         self.server_label.grid(row=0, column=0, pady=0, padx=10, sticky="w")
         self.interface_var = tk.StringVar()
+        self.iface_cache = (0.0, None)  # (timestamp, interfaces)
+        self.iface_menu = None          # interfaces shown in the menu
         self.interface_menu = ctk.CTkOptionMenu(self.server_frame,
                                                 variable=self.interface_var)
         self.interface_menu.grid(row=1, column=0, pady=(0, 5), padx=10, sticky="ew")
@@ -423,24 +603,28 @@ class SimpleNetconfClient(ctk.CTk):
         self.bind("<Control-0>", lambda event: self.reset_zoom_event())
         self.bind("<Control-o>", lambda event: self.open_file())
         self.bind("<Control-s>", lambda event: self.save_file())
-        self.bind("<Control-q>", lambda event: self.quit())
+        self.bind("<Control-q>", lambda event: self.on_close())
         self.bind("<Control-h>", lambda event: self.show_usage())
 
         # Bring frame into foreground and focus it when it becomes visible
         self.bind("<Map>", self.on_map)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Start the web server if enabled in a previous run.
         self.start_file_server()
 
-        # Start mDNS-SD scanning in background.
-        self.start_zeroconf_scanner()
+        # Start mDNS-SD scanning in background, once the window is up.
+        self.after_idle(self.start_zeroconf_scanner)
+        self.after(60_000, self.expire_sessions)
 
-        # Setup syntax highlighter
-        self.lexer = XmlLexer()
-        self.load_syntax_style(self.cfg.get("syntax_style", "monokai"))
+        # Setup syntax highlighter, the welcome text is highlighted once the
+        # window is up, the lexer is not needed before that
+        self.load_syntax_style(self.cfg.get("syntax_style", "monokai"),
+                               highlight=False)
+        self.after_idle(self.highlight_syntax)
         self.textbox.bind("<KeyRelease>", self.on_key_release)
 
-    def load_syntax_style(self, name):
+    def load_syntax_style(self, name, highlight=True):
         self.syntax_tags = []
         style = get_style_by_name(name)
 
@@ -470,7 +654,8 @@ class SimpleNetconfClient(ctk.CTk):
         if select_color:
             self.textbox.tag_config("sel", background=select_color)
 
-        self.highlight_syntax()
+        if highlight:
+            self.highlight_syntax()
         self.cfg["syntax_style"] = name
 
     def highlight_syntax(self,event=None):
@@ -490,7 +675,7 @@ class SimpleNetconfClient(ctk.CTk):
                 t, start, "range_start +%ic" % len(data)
             )
 
-        for token, content in lex(data, self.lexer):
+        for token, content in lex(data, xml_lexer()):
             self.textbox.mark_set("range_end", f"range_start + {len(content)}c")
             for t in token.split():
                 self.textbox.tag_add(str(t), "range_start", "range_end")
@@ -506,18 +691,34 @@ class SimpleNetconfClient(ctk.CTk):
         self.lift()
         self.focus_force()
 
+    def on_close(self):
+        """Release background resources and leave the main loop"""
+        self.cfg_mgr.flush()
+        # Drop queued RPCs, an RPC in flight finishes within its timeout
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.close()
+        self.stop_file_server()
+        self.server_executor.shutdown(wait=False)
+        if self.zeroconf:
+            # Also cancels the service browser
+            self.zeroconf.close()
+            self.zeroconf = None
+        self.quit()
+
     def start_zeroconf_scanner(self):
         """mDNS-SD scanner.  Tracks available NETCONF (XML/SSH) devices."""
-        svc = "_netconf-ssh._tcp.local."
+        from zeroconf import ServiceBrowser, Zeroconf
 
         self.zeroconf = Zeroconf()
         self.listener = ZeroconfListener(self)
-        self.browser = ServiceBrowser(self.zeroconf, svc,
+        # Browse only our service type, record updates for other
+        # services on the LAN never reach the listener
+        self.browser = ServiceBrowser(self.zeroconf, [NETCONF_SVC],
                                       self.listener)
-        self.status(f"mDNS-SD scanning for {svc} capable devices ...")
+        self.status(f"mDNS-SD scanning for {NETCONF_SVC} capable devices ...")
 
     def update_device_list(self, devices):
-        self.devices = list(devices.values())
+        self.devices = devices
 
     def show_device_list(self):
         if not self.devices:
@@ -527,7 +728,6 @@ class SimpleNetconfClient(ctk.CTk):
             self.wait_window(dialog)
             if dialog.selected_device:
                 name, ip, port = dialog.selected_device
-                name = name.rstrip('.')
                 self.cfg['addr'] = ip
                 self.cfg['port'] = port
                 self.entries['addr'].delete(0, 'end')
@@ -548,11 +748,17 @@ class SimpleNetconfClient(ctk.CTk):
             self.cfg['server_path'] = self.server_path
             self.server_path_entry.delete(0, 'end')
             self.server_path_entry.insert(0, str(self.cfg['server_path']))
-            self.cfg_mgr.save()
+            self.cfg_mgr.save_debounced()
             self.restart_file_server()
             self.status(f"HTTP server, serving files from: {self.server_path}")
 
-    def get_interfaces(slf):
+    def get_interfaces(self):
+        """List of (name, address) for all non-loopback IPv4 interfaces"""
+        stamp, interface_list = self.iface_cache
+        now = time.monotonic()
+        if interface_list is not None and now - stamp < IFACE_CACHE_TTL:
+            return interface_list
+
         interfaces = psutil.net_if_addrs()
         interface_list = []
         for interface in interfaces:
@@ -560,12 +766,15 @@ class SimpleNetconfClient(ctk.CTk):
                 if addr.family == socket.AF_INET and not addr.address.startswith('127.'):
                     interface_list.append((interface, addr.address))
                     break
+
+        self.iface_cache = (now, interface_list)
         return interface_list
 
-    def select_default_interface(self):
+    def select_default_interface(self, interfaces=None):
         """Get default interface, either a saved one, or first Ethernet"""
         patterns = ["eth", "en", "local area connection"]
-        interfaces = self.get_interfaces()
+        if interfaces is None:
+            interfaces = self.get_interfaces()
 
         for interface, ip in interfaces:
             if interface == self.cfg['server_iface']:
@@ -580,14 +789,16 @@ class SimpleNetconfClient(ctk.CTk):
 
     def update_interface_menu(self):
         interfaces = self.get_interfaces()
-        if interfaces:
+        # Reconfiguring the menu redraws it, skip if nothing changed
+        if interfaces and interfaces != self.iface_menu:
+            self.iface_menu = interfaces
             self.interface_menu.configure(values=[f"{name} ({ip})" for name, ip in interfaces])
-            default_interface, default_ip = self.select_default_interface()
+            default_interface, default_ip = self.select_default_interface(interfaces)
             if default_interface:
                 self.interface_var.set(f"{default_interface} ({default_ip})")
 
     def get_iface_ip(self):
-        match = re.match(r"(\w+)\s+\(([\d\.]+)\)", self.interface_var.get())
+        match = IFACE_RE.match(self.interface_var.get())
         return match.groups() if match else (None, None)
 
     def save_server_settings(self):
@@ -600,7 +811,7 @@ class SimpleNetconfClient(ctk.CTk):
         except ValueError:
             self.error("Invalid server port. Please enter a valid number.")
             return
-        self.cfg_mgr.save()
+        self.cfg_mgr.save_debounced()
         if self.restart_file_server():
             self.status("Web server settings updated and server restarted.")
         else:
@@ -610,21 +821,40 @@ class SimpleNetconfClient(ctk.CTk):
         if not self.cfg['server_enabled']:
             return False
 
+        # Only needed when the server is enabled, import on first use
+        from simple_netconf_client.network.FileServer import FileServer
+
         interface = self.cfg['server_iface']
-        port = self.cfg['server_port']
-        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=self.server_path)
-        self.server = socketserver.TCPServer(("", port), handler)
-        self.server_thread = threading.Thread(target=self.server.serve_forever)
-        self.server_thread.daemon = True
-        self.server_thread.start()
-        self.status(f"HTTP server, serving files on {interface}:{port}")
+        host_ip, port = self.file_server_address()
+        self.server = FileServer((host_ip, port), self.server_path)
+        # Short poll interval, shutdown() waits for the loop to notice
+        self.server_executor.submit(self.server.serve_forever, poll_interval=0.25)
+        if host_ip != "0.0.0.0":
+            self.status(f"HTTP server, serving files on {interface}:{port}")
+        else:
+            self.error(f"Interface {interface} has no IPv4 address, serving files on all interfaces port {port}")
         return True
 
+    def file_server_address(self):
+        """Only listen on the selected interface, not on all of them"""
+        host_ip = dict(self.get_interfaces()).get(self.cfg['server_iface'])
+        return (host_ip or "0.0.0.0", self.cfg['server_port'])
+
     def restart_file_server(self):
+        if self.server:
+            if self.cfg['server_enabled'] and \
+               self.server.server_address == self.file_server_address():
+                # Same address, no need to tear down the listening socket
+                self.server.directory = self.server_path
+                return True
+            self.stop_file_server()
+        return self.start_file_server()
+
+    def stop_file_server(self):
         if self.server:
             self.server.shutdown()
             self.server.server_close()
-        return self.start_file_server()
+            self.server = None
 
     # UI METHODS
     def undo(self):
@@ -640,117 +870,79 @@ class SimpleNetconfClient(ctk.CTk):
             pass  # Ignore the error if there's nothing to redo
 
     def select_all(self):
-        self.textbox.tag_add("sel", "1.0", "end")
+        # Single tag_add, excluding the implicit trailing newline
+        self.textbox.tag_add("sel", "1.0", "end-1c")
         return 'break'  # Prevent default behavior
 
     def load_icons(self):
-        self.icon_images = {
-            'save': Image.open(resource_path("icons/save.png")),
-            'load': Image.open(resource_path("icons/open.png")),
-            'exit': Image.open(resource_path("icons/close.png")),
-            'tran': Image.open(resource_path("icons/transparent.png"))
-        }
-        self.icons = {
-            'save': ImageTk.PhotoImage(self.icon_images['save']),
-            'load': ImageTk.PhotoImage(self.icon_images['load']),
-            'exit': ImageTk.PhotoImage(self.icon_images['exit']),
-            'tran': ImageTk.PhotoImage(self.icon_images['tran'])
-        }
-        self.load_icon = self.icons['load']
-        self.save_icon = self.icons['save']
-        self.exit_icon = self.icons['exit']
-        self.transparent_icon = self.icons['tran']
+        # Decoded on first use, see icon_image()
+        self.icon_images = {}
+        # Menu icons recolored for light/dark mode, keyed by color
+        self.tinted_icons = {}
+
+        # Set by attach_menu_icons(), after the window is first drawn
+        self.load_icon = None
+        self.save_icon = None
+        self.exit_icon = None
+        self.transparent_icon = None
+
+    def attach_menu_icons(self):
+        # Help entries get a blank icon, to line up with the File menu
+        self.transparent_icon = ImageTk.PhotoImage(self.icon_image('tran'))
+        for entry in range(3):
+            self.help_menu.entryconfig(entry, image=self.transparent_icon)
+
+        # The menu icons are only created tinted, never in their original color
+        self.update_menu_icons()
 
-    def update_menu_icons(self):
+    def icon_image(self, name):
+        image = self.icon_images.get(name)
+        if image is None:
+            # Decode and convert once, shared by all tinted variants
+            image = Image.open(resource_path(ICON_FILES[name])).convert("RGBA")
+            self.icon_images[name] = image
+        return image
+
+    def menu_icons(self):
+        """Menu icons tinted for the current appearance mode"""
         if ctk.get_appearance_mode() == "Dark":
             color = "white"
         else:
             color = "black"
 
-        load_icon = self.change_icon_color(self.icon_images['load'], color)
-        save_icon = self.change_icon_color(self.icon_images['save'], color)
-        exit_icon = self.change_icon_color(self.icon_images['exit'], color)
+        # Only two colors, recolor once each and reuse on theme changes
+        icons = self.tinted_icons.get(color)
+        if icons is None:
+            icons = {name: self.change_icon_color(self.icon_image(name), color)
+                     for name in ('load', 'save', 'exit')}
+            self.tinted_icons[color] = icons
+        return icons
 
-        self.file_menu.entryconfig(0, image=load_icon)
-        self.file_menu.entryconfig(1, image=save_icon)
-        self.file_menu.entryconfig(3, image=exit_icon)
+    def update_menu_icons(self):
+        if self.transparent_icon is None:
+            return  # Not attached yet, theme is applied by attach_menu_icons()
+        icons = self.menu_icons()
+        if icons['load'] is self.load_icon:
+            return  # Same appearance mode, menu already shows these
+        self.file_menu.entryconfig(0, image=icons['load'])
+        self.file_menu.entryconfig(1, image=icons['save'])
+        self.file_menu.entryconfig(3, image=icons['exit'])
 
         # Keep a reference to prevent garbage collection
-        self.load_icon = load_icon
-        self.save_icon = save_icon
-        self.exit_icon = exit_icon
+        self.load_icon = icons['load']
+        self.save_icon = icons['save']
+        self.exit_icon = icons['exit']
 
     def change_icon_color(self, image, color):
-        # Convert the color to RGBA
-        r, g, b = Image.new("RGB", (1, 1), color).getpixel((0, 0))
-        color = (r, g, b, 255)
-
-        # Create a new image with the same size and an RGBA mode
-        new_image = Image.new("RGBA", image.size)
-
-        # Get the pixel data from the original image
-        pixels = image.getdata()
-
-        # Process each pixel
-        new_pixels = []
-        for pixel in pixels:
-            if pixel[3] > 0:  # If not transparent
-                new_pixels.append(color)  # Change to the new color
-            else:
-                new_pixels.append(pixel)  # Preserve transparency
-
-        new_image.putdata(new_pixels)
+        # Opaque pixels get the new color, transparent ones are kept as-is,
+        # image is RGBA, see icon_image()
+        mask = image.getchannel("A").point(ALPHA_MASK_LUT)
+        new_image = Image.composite(Image.new("RGBA", image.size, color),
+                                    image, mask)
 
         # Convert to PhotoImage
         return ImageTk.PhotoImage(new_image)
 
-    def get_system_theme(self):
-        try:
-            # Check for dark mode on Linux Mint using gsettings
-            result = subprocess.run(['gsettings', 'get',
-                                     'org.cinnamon.desktop.interface',
-                                     'gtk-theme'],
-                                    capture_output=True,
-                                    text=True)
-            if result.returncode == 0:
-                theme = result.stdout.strip().strip("'")
-                if 'dark' in theme.lower():
-                    return "Dark"
-                return "Light"
-        except Exception:
-            pass
-
-        try:
-            # Check for dark mode on Gnome using gsettings
-            result = subprocess.run(['gsettings', 'get',
-                                     'org.gnome.desktop.interface',
-                                     'color-scheme'],
-                                    capture_output=True,
-                                    text=True)
-            if result.returncode == 0:
-                theme = result.stdout.strip().strip("'")
-                if 'dark' in theme.lower():
-                    return "Dark"
-                return "Light"
-        except Exception:
-            pass
-
-        try:
-            # Check for dark mode on Windows
-            if platform.system() == "Windows":
-                import winreg
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\"\
-                      "Microsoft\Windows\CurrentVersion\Themes\Personalize')
-                value, _ = winreg.QueryValueEx(key, 'AppsUseLightTheme')
-                if value == 0:
-                    return "Dark"
-                return "Light"
-        except Exception:
-            pass
-
-        # Fallback to Ctk detected system
-        return "System"
-
     def get_menu_bg_color(self):
         if ctk.get_appearance_mode() == "Dark":
             return "#333333"
@@ -788,6 +980,12 @@ class SimpleNetconfClient(ctk.CTk):
         dialog.geometry(f"{dialog_width}x{dialog_height}+{position_right}+{position_down}")
 
     def _update_status(self, message, error=False):
+        if threading.current_thread() is not threading.main_thread():
+            # Called from an RPC worker, widgets are only safe to touch
+            # from the Tk main loop
+            self.after(0, self._update_status, message, error)
+            return
+
         if error:
             self.status_label.configure(text=f"Error: {message}",
                                         text_color=("#FF0000", "#FF4C4C"))
@@ -796,13 +994,65 @@ class SimpleNetconfClient(ctk.CTk):
             self.status_label.configure(text=message,
                                         text_color=("#000000", "#FFFFFF"))
             logging.info(message)
-        # Update GUI even if we run in an callback
-        self.update_idletasks()
 
     def rpc(self, message, method):
         self._update_status(f"RPC: {message}", error=False)
         self.rpc_cb = method
 
+    def run_rpc(self, work, done, failure, retry=True):
+        """Run work(m) on a NETCONF session in a worker thread
+
+        The result of work() is handed to done() in the Tk main loop, unless
+        it is None, meaning the worker has already reported an error.  Any
+        exception raised is reported prefixed by the failure message.
+
+        If a pooled session turns out to be dead, work() is retried once on
+        a new session.  Pass retry=False for RPCs that must not be sent
+        twice, e.g., reboot: the device may drop the session after the RPC
+        has been sent, which looks the same."""
+        cfg = self.cfg.copy()
+
+        def task():
+            from ncclient.transport.errors import TransportError
+
+            for retry_ok in (retry, False):
+                conn = NetconfConnection(cfg, self, self.pool)
+                with conn as m:
+                    if m is None:
+                        return None
+                    try:
+                        return work(m)
+                    except TransportError:
+                        # A pooled session may have died while idle, drop
+                        # it and retry once on a new session
+                        if not (retry_ok and conn.reused):
+                            raise
+                        conn.discard()
+
+        for button in self.rpc_buttons:
+            button.configure(state="disabled")
+        future = self.executor.submit(task)
+        future.add_done_callback(
+            lambda f: self.after(0, self._rpc_done, f, done, failure))
+
+    def expire_sessions(self):
+        """Periodically close idle NETCONF sessions, in the background"""
+        self.executor.submit(self.pool.expire)
+        self.after(60_000, self.expire_sessions)
+
+    def _rpc_done(self, future, done, failure):
+        for button in self.rpc_buttons:
+            button.configure(state="normal")
+        try:
+            result = future.result()
+        except Exception as err:
+            self.error(f"{failure}: {err}")
+            logging.debug("%s", failure, exc_info=err)
+            return
+
+        if result is not None:
+            done(result)
+
     def status(self, message):
         self._update_status(f"Status: {message}", error=False)
 
@@ -813,8 +1063,27 @@ class SimpleNetconfClient(ctk.CTk):
         self.textbox.delete(0.0, 'end')
 
     def show(self, text):
+        self.show_parts([text])
+
+    def show_parts(self, parts):
+        """Show text parts one per line, inserted one by one
+
+        A large reply is never joined into one string, neither here nor by
+        highlight_syntax(), which is skipped above max_highlighting_size."""
+        large = sum(len(part) + 1 for part in parts) > self.cfg["max_highlighting_size"]
+        if large:
+            # Undo history would hold on to large replies, twice, do not
+            # record the insert at all rather than dropping it afterwards
+            self.textbox.configure(undo=False)
         self.clear()
-        self.textbox.insert("0.0", text)
+        for i, part in enumerate(parts):
+            if i:
+                self.textbox.insert("end", "\n")
+            self.textbox.insert("end", part)
+        if large:
+            self.textbox.configure(undo=True)
+            self.textbox.edit_reset()  # history of the replaced text
+            return
         self.highlight_syntax()
 
     def open_input_dialog_event(self):
@@ -822,11 +1091,14 @@ class SimpleNetconfClient(ctk.CTk):
                                     title="CTkInputDialog")
         print("CTkInputDialog:", dialog.get_input())
 
-    def change_theme_mode_event(self, theme: str):
+    def change_theme_mode_event(self, theme: str, refresh=False):
         self.cfg['theme'] = theme
-        self.cfg_mgr.save()
+        self.cfg_mgr.save_debounced()
         if theme == 'System':
-            theme = self.get_system_theme()
+            if refresh:
+                # Explicitly selected, the desktop theme may have changed
+                get_system_theme.cache_clear()
+            theme = get_system_theme()
         ctk.set_appearance_mode(theme)
         self.update_menu_colors()
         self.update_menu_icons()
@@ -835,7 +1107,7 @@ class SimpleNetconfClient(ctk.CTk):
         new_scaling_float = int(new_scaling.replace("%", "")) / 100
         ctk.set_widget_scaling(new_scaling_float)
         self.cfg['zoom'] = new_scaling
-        self.cfg_mgr.save()
+        self.cfg_mgr.save_debounced()
 
     def zoom_in_event(self):
         current_zoom = int(self.zoom_var.get().replace("%", ""))
@@ -857,10 +1129,12 @@ class SimpleNetconfClient(ctk.CTk):
 
     def open_file(self):
         files = [('XML File', '*.xml')]
-        file = filedialog.askopenfile(initialdir=self.server_path,
-                                      filetypes=files, defaultextension=files)
-        if file is not None:
-            content = file.read()
+        path = filedialog.askopenfilename(initialdir=self.server_path,
+                                          filetypes=files, defaultextension=files)
+        if path:
+            # Binary read and a single decode, the text box wants \n only
+            with open(path, "rb") as file:
+                content = file.read().decode("utf-8").replace("\r\n", "\n")
             self.show(content)
 
     def save_file(self):
@@ -868,8 +1142,13 @@ class SimpleNetconfClient(ctk.CTk):
         path = filedialog.asksaveasfilename(filetypes=files,
                                             defaultextension=files)
         if path:
-            with open(path, "w") as file:
-                file.write(self.textbox.get('1.0', END))
+            # Write in blocks of lines, large replies are never copied out
+            # of the text box as a single string
+            lines = int(self.textbox.index('end').split('.')[0])
+            with open(path, "wb") as file:
+                for line in range(1, lines + 1, SAVE_BLOCK_LINES):
+                    block = self.textbox.get(f"{line}.0", f"{line + SAVE_BLOCK_LINES}.0")
+                    file.write(block.encode("utf-8"))
 
     def show_about(self):
         AboutDialog(self, 320, 260)
@@ -880,33 +1159,18 @@ class SimpleNetconfClient(ctk.CTk):
     def show_usage(self):
         fn = self._full_path("usage.md")
         try:
-            with open(fn, "r") as file:
-                content = file.read()
-                UsageDialog(self, content, 800, 700)
+            content = read_text(fn)
         except FileNotFoundError:
             self.error(f"file {fn} not found.")
+            return
+        UsageDialog(self, content, 800, 700)
 
 
     def show_html_dialog(self, title, html_content):
+        from tkinterweb import HtmlFrame
         dialog = Toplevel(self)
         dialog.title(title)
 
-        # Set the desired size of the dialog
-        dialog_width = 800
-        dialog_height = 600
-
-        # Calculate the position to center the dialog over the main application window
-        main_x = self.winfo_rootx()
-        main_y = self.winfo_rooty()
-        main_width = self.winfo_width()
-        main_height = self.winfo_height()
-
-        position_right = int(main_x + (main_width - dialog_width) / 2)
-        position_down = int(main_y + (main_height - dialog_height) / 2)
-
-        # Set the geometry of the dialog to center it on the main application window
-        dialog.geometry(f"{dialog_width}x{dialog_height}+{position_right}+{position_down}")
-
         html_frame = HtmlFrame(dialog, horizontal_scrollbar="auto", messages_enabled = False)
         html_frame.load_html(html_content)
         html_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -914,6 +1178,8 @@ class SimpleNetconfClient(ctk.CTk):
         close_button = ctk.CTkButton(dialog, text="Close", command=dialog.destroy)
         close_button.pack(pady=10)
 
+        self.center_dialog(dialog, 800, 600)
+
     # CONNECTION PARAMETERS METHODS
     def save_params(self):
         if self.address.get() == "" or self.port_select.get() == "" \
@@ -928,14 +1194,22 @@ class SimpleNetconfClient(ctk.CTk):
 
         if not self.is_timeout_valid():
             self.error("RPC timeout must be a positive number")
+            return
 
-        self.cfg['addr'] = self.address.get()
-        self.cfg['port'] = self.port_select.get()
-        self.cfg['timeout'] = self.timeout_select.get()
-        self.cfg['user'] = self.username.get()
-        self.cfg['pass'] = self.password.get()
-        self.cfg['ssh-agent'] = self.ssh_agent.get()
-        self.cfg_mgr.save()
+        params = {
+            'addr': self.address.get(),
+            'port': int(self.port_select.get()),
+            'timeout': int(self.timeout_select.get()),
+            'user': self.username.get(),
+            'pass': self.password.get(),
+            'ssh-agent': self.ssh_agent.get(),
+        }
+        if any(self.cfg[key] != value for key, value in params.items()):
+            # Sessions opened with the old parameters are of no further
+            # use, close them in the background rather than on expiry
+            self.executor.submit(self.pool.close)
+        self.cfg.update(params)
+        self.cfg_mgr.save_debounced()
 
         self.status("Connection parameters updated.")
 
@@ -968,56 +1242,32 @@ class SimpleNetconfClient(ctk.CTk):
 
     def save_interface(self):
         self.cfg['server_iface'] = self.interface_entry.get()
-        self.cfg_mgr.save()
+        self.cfg_mgr.save_debounced()
         self.restart_file_server()
         self.status("Settings saved and web server restarted.")
 
     # PROFINET STATUS METHODS
     def _full_path(self, relative_path):
         """Local helper function to get full file path"""
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-
-        return os.path.join(base_path, relative_path)
+        return resource_path(relative_path)
 
     def profinet_cb(self, status):
-        xml_path = ""
-        if status == "Enable":
-            xml_path = self._full_path("enable-profinet.xml")
-        else:
-            xml_path = self._full_path("disable-profinet.xml")
+        xml_path = self._full_path(PROFINET_FILES[status])
         try:
-            with open(xml_path, 'r') as file:
-                xml_payload = file.read()
+            xml_payload = read_text(xml_path)
             self.show(xml_payload)
         except FileNotFoundError:
             self.error(f"file {xml_path} not found!")
 
     # Get configuration/datastore method(s)
-    def extract_xml_data(self, xml_string):
+    def extract_xml_data(self, response):
+        """List of the pretty-printed children of <data>, see show_parts()"""
         try:
-            dom = parseString(xml_string)
-            data_element = dom.getElementsByTagName("data")[0]
-            # Create a new DOM document to pretty print the inner content
-            pretty_dom = parseString(data_element.toxml())
-            pretty_xml = pretty_dom.toprettyxml(indent="    ")  # 4 spaces
-
-            # Remove the XML declaration and <data> tags
-            lines = pretty_xml.split("\n")[2:-2]
-
-            # Remove leading indentation
-            min_indent = float('inf')
-            for line in lines:
-                stripped_line = line.lstrip()
-                if stripped_line:
-                    indent = len(line) - len(stripped_line)
-                    min_indent = min(min_indent, indent)
-            lines = [line[min_indent:] if line.strip() else line for line in lines]
-
-            inner_xml = "\n".join(lines)
-            return inner_xml
+            data = getattr(response, "data_ele", None)
+            if data is not None:
+                # <get-config> et al. replies are already parsed by ncclient
+                return [pretty_subtree(child) for child in list(data)]
+            return list(iter_xml_data(response.xml))
         except Exception as err:
             self.error(f"Error extracting data from XML: {err}")
             return None
@@ -1027,22 +1277,21 @@ class SimpleNetconfClient(ctk.CTk):
             self.error("Connection parameters cannot be empty!")
             return
 
-        config = str(config).lower()
+        config = config.lower()  # "Running" -> "running"
         self.status(f"Fetching {config}-config ...")
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
-            try:
-                response = m.get_config(source=config)
-                data = self.extract_xml_data(response.xml)
-                self.show(data)
-                self.status(f"showing {config}-config.")
-            except Exception as err:
-                self.error(f"Failed fetching configuration: {err}")
-                print(err)
+
+        def work(m):
+            response = m.get_config(source=config)
+            return self.extract_xml_data(response)
+
+        def done(data):
+            self.show_parts(data)
+            self.status(f"showing {config}-config.")
+
+        self.run_rpc(work, done, "Failed fetching configuration")
 
     def put_config_cb(self, config):
-        config = str(config).lower()
+        config = config.lower()  # "Running" -> "running"
         fn = filedialog.askopenfilename(
             title="Select config file",
             filetypes=[("XML files", "*.xml")]
@@ -1059,40 +1308,60 @@ class SimpleNetconfClient(ctk.CTk):
                 self.error(f"Failed to load config file {fn}: {err}")
 
     def execute_put_config(self):
-        self.status(f"Restoring {self.target} configuration, please wait ...")
+        target = self.target
 
-        # Wrap the extracted data in the required XML framing
-        config_data = f"""
+        # Wrap the extracted data in the required XML framing, parsed here
+        # once, ncclient takes the element as-is
+        try:
+            config_data = to_ele(f"""
         <nc:config xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0">
-            {self.textbox.get("1.0", END)}
+            {self.textbox.get(*TEXT_RANGE)}
         </nc:config>
-        """
+        """)
+        except XMLSyntaxError as err:
+            self.error(f"XML Syntax Error: {err}")
+            return False
+
+        self.status(f"Restoring {target} configuration, please wait ...")
         self.clear()
 
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
+        def work(m):
+            return m.edit_config(target=target, config=config_data)
 
-            try:
-                m.edit_config(target=self.target, config=config_data)
-                self.status(f"Configuration saved to {self.target}-config!")
-            except Exception as err:
-                self.error(f"Failed to save {self.target}-config: {err}")
-                print(err)
+        def done(_):
+            self.status(f"Configuration saved to {target}-config!")
+
+        self.run_rpc(work, done, f"Failed to save {target}-config", retry=False)
+        return True
 
     def copy_config(self):
         self.clear()
         self.status("Calling 'copy running-config startup-config', please wait ...")
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
-            try:
-                # Copy running configuration to startup configuration
-                m.copy_config(source='running', target='startup')
-                self.status("running configuration saved to startup.")
-            except Exception as err:
-                self.error(f"Failed to save configuration: {err}")
-                print(err)
+
+        def work(m):
+            # Copy running configuration to startup configuration
+            return m.copy_config(source='running', target='startup')
+
+        def done(_):
+            self.status("running configuration saved to startup.")
+
+        self.run_rpc(work, done, "Failed to save configuration")
+
+    def textbox_rpc(self, text=None):
+        """Parse the RPC in the text box, before any session is opened
+
+        Errors are reported here, and None returned."""
+        if text is None:
+            text = self.textbox.get(*TEXT_RANGE)
+        try:
+            return rpc_ele(text)
+        except XMLSyntaxError as err:
+            self.error(f"XML Syntax Error: {err}")
+        except DocumentInvalid as err:
+            self.error(f"Document Invalid: {err}")
+        except TypeError as err:
+            self.error(f"Type Error: {err}")
+        return None
 
     # Operational method(s)
     def get_oper_cb(self):
@@ -1102,20 +1371,21 @@ class SimpleNetconfClient(ctk.CTk):
 
     def execute_get_oper(self):
         """Fetch operational data"""
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
+        rpc = self.textbox_rpc()
+        if rpc is None:
+            return False
+        self.show("")
 
-            rpc = to_ele(self.textbox.get("1.0", END))
-            self.show("")
-            try:
-                response = m.dispatch(rpc, source=None, filter=None)
-                data = self.extract_xml_data(response.xml)
-                self.show(data)
-                self.status("showing (filtered) operational datastore.")
-            except Exception as err:
-                self.error(f"Failed fetching operational: {err}")
-                print(err)
+        def work(m):
+            response = m.dispatch(rpc, source=None, filter=None)
+            return self.extract_xml_data(response)
+
+        def done(data):
+            self.show_parts(data)
+            self.status("showing (filtered) operational datastore.")
+
+        self.run_rpc(work, done, "Failed fetching operational")
+        return True
 
     # REBOOT METHODS
     def reboot_cb(self):
@@ -1123,20 +1393,21 @@ class SimpleNetconfClient(ctk.CTk):
         self.rpc("Reboot device", self.execute_reboot)
 
     def execute_reboot(self):
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
+        rpc = self.textbox_rpc()
+        if rpc is None:
+            return False
+        self.show("")
+        self.status("Please wait while device reboots ...")
 
-            rpc = to_ele(self.textbox.get("1.0", END))
-            self.show("")
-            try:
-                self.status("Please wait while device reboots ...")
-                response = m.dispatch(rpc, source=None, filter=None)
-                self.show(response)
-                self.status("done.")
-            except Exception as err:
-                self.error(f"Failed reboot: {err}")
-                print(err)
+        def work(m):
+            return pretty_reply(m.dispatch(rpc, source=None, filter=None))
+
+        def done(reply):
+            self.show(reply)
+            self.status("done.")
+
+        self.run_rpc(work, done, "Failed reboot", retry=False)
+        return True
 
     # FACTORY RESET METHODS
     def factory_reset_cb(self):
@@ -1144,37 +1415,46 @@ class SimpleNetconfClient(ctk.CTk):
         self.rpc("Perform factory reset", self.execute_factory_reset)
 
     def execute_factory_reset(self):
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
-            try:
-                rpc = to_ele(self.textbox.get("1.0", END))
-                response = m.dispatch(rpc, source=None, filter=None)
-                self.show(response)
-                self.status("done.")
-            except Exception as err:
-                self.error(f"Failed factory reset: {err}")
-                print(err)
+        rpc = self.textbox_rpc()
+        if rpc is None:
+            return False
+
+        def work(m):
+            return pretty_reply(m.dispatch(rpc, source=None, filter=None))
+
+        def done(reply):
+            self.show(reply)
+            self.status("done.")
+
+        self.run_rpc(work, done, "Failed factory reset", retry=False)
+        return True
 
     # TIME SETTING METHODS
     def time_set_cb(self):
-        self.show(RPC_SET_DATETIME)
+        self.time_rpc = rpc_set_datetime()
+        self.show(self.time_rpc)
         self.rpc("Set system date/time", self.execute_time_set)
 
     def execute_time_set(self):
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
+        text = self.textbox.get(*TEXT_RANGE)
+        if text.strip() == self.time_rpc.strip():
+            # Not edited, send the time of Send rather than of showing it
+            rpc = to_ele(rpc_set_datetime())
+        else:
+            rpc = self.textbox_rpc(text)
+            if rpc is None:
+                return False
+        self.show("")
 
-            rpc = to_ele(self.textbox.get("1.0", END))
-            self.show("")
-            try:
-                response = m.dispatch(rpc, source=None, filter=None)
-                self.show(response)
-                self.status("done.")
-            except Exception as err:
-                self.error(f"{err}")
-                print(err)
+        def work(m):
+            return pretty_reply(m.dispatch(rpc, source=None, filter=None))
+
+        def done(reply):
+            self.show(reply)
+            self.status("done.")
+
+        self.run_rpc(work, done, "Failed setting system time", retry=False)
+        return True
 
     # UPGRADE METHODS
     def upgrade_cb(self):
@@ -1189,6 +1469,13 @@ class SimpleNetconfClient(ctk.CTk):
 
             (_, host_ip) = self.get_iface_ip()
             host_port = self.cfg['server_port']
+            if self.restart_file_server():
+                # Point the device at where the server listens, the menu
+                # selection may not be applied yet.  Restarting rebinds
+                # it if the interface address has changed, e.g., by DHCP
+                bound_ip, host_port = self.server.server_address[:2]
+                if bound_ip != "0.0.0.0":
+                    host_ip = bound_ip
             pkg = os.path.basename(self.upgrade_file)
 
             url = f"http://{host_ip}:{host_port}/{pkg}"
@@ -1199,31 +1486,27 @@ class SimpleNetconfClient(ctk.CTk):
 
         logging.debug("Upgrade URL: %s", url)
 
-        rpc = f"""<install-bundle xmlns="urn:infix:system:ns:yang:1.0">
-    <url>{url}</url>
-</install-bundle>
-"""
-        self.show(rpc)
+        self.show(rpc_install_bundle(url))
         self.rpc("Upgrade device", self.start_upgrade)
 
     def start_upgrade(self):
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
+        rpc = self.textbox_rpc()
+        if rpc is None:
+            return False
+        self.show("")
 
-            rpc = to_ele(self.textbox.get("1.0", END))
-            self.show("")
-            try:
-                response = m.dispatch(rpc)
-                if '<ok/>' in response.xml:
-                    self.status("Upgrade started successfully.")
-                else:
-                    dom = parseString(response.xml)
-                    self.show(str(dom.toprettyxml()))
-                    raise Exception("Failed starting upgrade!")
-            except Exception as err:
-                self.error(f"Failed starting upgrade: {err}")
-                print(err)
+        def work(m):
+            return m.dispatch(rpc)
+
+        def done(response):
+            if response.ok:
+                self.status("Upgrade started successfully.")
+            else:
+                self.show(pretty_reply(response))
+                self.error("Failed starting upgrade!")
+
+        self.run_rpc(work, done, "Failed starting upgrade", retry=False)
+        return True
 
     # NETCONF COMMANDS METHODS
     def execute_netconf_command(self):
@@ -1232,35 +1515,26 @@ class SimpleNetconfClient(ctk.CTk):
             return
 
         if self.rpc_cb:
-            self.rpc_cb()
-            self.rpc_cb = None
+            # Handlers return False when nothing was sent, e.g. on a syntax
+            # error, keep the handler so the RPC can be fixed and resent
+            if self.rpc_cb():
+                self.rpc_cb = None
             return
 
-        with NetconfConnection(self.cfg, self) as m:
-            if m is None:
-                return
-            try:
-                # Generic RPC composed manually
-                try:
-                    rpc = to_ele(self.textbox.get('1.0', END))
-                except XMLSyntaxError as err:
-                    self.error(f"XML Syntax Error: {err}")
-                    return
-                except DocumentInvalid as err:
-                    self.error(f"Document Invalid: {err}")
-                    return
-                except TypeError as err:
-                    self.error(f"Type Error: {err}")
-                    return
-
-                response = m.dispatch(rpc, source=None, filter=None)
-                if response.ok:
-                    data = self.extract_xml_data(response.xml)
-                    self.show(data)
-                    self.status("Command run successfully!")
-                else:
-                    self.error(str(response))
-            except Exception as err:
-                self.error("Command failed! Check connection parameters.")
-                print(err)
+        # Generic RPC composed manually
+        rpc = self.textbox_rpc()
+        if rpc is None:
+            return
+
+        def work(m):
+            response = m.dispatch(rpc, source=None, filter=None)
+            if not response.ok:
+                self.error(str(response))
+                return None
+            return self.extract_xml_data(response)
+
+        def done(data):
+            self.show_parts(data)
+            self.status("Command run successfully!")
 
+        self.run_rpc(work, done, "Command failed, check connection parameters", retry=False)
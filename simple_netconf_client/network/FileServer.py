@@ -0,0 +1,50 @@
+import threading
+import socketserver
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+class FileRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files from the server's current directory"""
+    # Idle or stalled clients must not hold on to a slot forever
+    timeout = 30
+
+    def __init__(self, request, client_address, server):
+        super().__init__(request, client_address, server,
+                         directory=server.directory)
+
+
+class FileServer(ThreadingHTTPServer):
+    """HTTP server for upgrade packages, one thread per request.
+
+    The number of requests served at the same time is bounded, requests
+    arriving when all slots are taken are refused, the accept loop never
+    blocks.  The directory served can be changed while running, it applies
+    to the next request.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, directory, max_workers=8):
+        self.directory = directory
+        self.slots = threading.BoundedSemaphore(max_workers)
+        super().__init__(address, FileRequestHandler)
+
+    def server_bind(self):
+        # Skip HTTPServer's reverse DNS lookup of our own address, it is
+        # only used for CGI and may block for seconds
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = self.server_address[:2]
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
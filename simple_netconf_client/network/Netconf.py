@@ -1,17 +1,38 @@
 import os
 import socket
 import json
+import time
 import logging
-from ncclient import manager
-from ncclient.transport.errors import AuthenticationError, SSHError
+import threading
+import weakref
+
+# mDNS-SD service type advertised by NETCONF (XML/SSH) devices
+NETCONF_SVC = "_netconf-ssh._tcp.local."
+# Seconds between SSH keepalives on pooled NETCONF sessions
+SSH_KEEPALIVE = 30
 
 class NetconfConnection:
-    def __init__(self, cfg, app):
+    __slots__ = ('cfg', 'app', 'pool', 'manager', 'reused')
+
+    def __init__(self, cfg, app, pool=None):
         self.cfg = cfg
         self.app = app
+        self.pool = pool
         self.manager = None
+        self.reused = False
 
     def __enter__(self):
+        if self.pool is not None:
+            self.manager, self.reused = self.pool.acquire(self.cfg)
+            return self.manager
+        return self.connect()
+
+    def connect(self):
+        """Open NETCONF session, returns the manager or None on error"""
+        # ncclient pulls in paramiko and cryptography, import on first use
+        from ncclient import manager
+        from ncclient.transport.errors import AuthenticationError, SSHError
+
         try:
             host = self.cfg['addr']
             port = self.cfg['port']
@@ -34,39 +55,172 @@ class NetconfConnection:
             self.app.error(f"An unexpected error occurred: {err}")
             raise err
 
+    def discard(self):
+        """Close a broken session, it is not returned to the pool"""
+        manager, self.manager = self.manager, None
+        if manager is not None:
+            NetconfSessionPool._close(manager)
+
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.manager is not None:
+        if self.manager is None:
+            return
+        if self.pool is not None:
+            self.pool.release(self.cfg, self.manager)
+        else:
             self.manager.close_session()
             logging.info("Disconnected from NETCONF server")
 
 
+class NetconfSessionPool:
+    """Open NETCONF sessions, reused between RPCs
+
+    Sessions are keyed on the connection parameters.  A session is handed
+    out to one user at a time, and is closed when it has been idle in the
+    pool for longer than idle_timeout seconds.
+
+    close() also retires sessions in use at the time, they are closed
+    rather than pooled when released."""
+    __slots__ = ('app', 'idle_timeout', 'sessions', 'lock', 'generation',
+                 'issued')
+
+    def __init__(self, app, idle_timeout=300):
+        self.app = app
+        self.idle_timeout = idle_timeout
+        self.sessions = {}      # key -> (manager, last used)
+        self.lock = threading.RLock()
+        self.generation = 0     # bumped by close()
+        # manager -> pool generation when it was handed out
+        self.issued = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(cfg):
+        return (cfg['addr'], cfg['port'], cfg['user'], cfg['pass'],
+                cfg['ssh-agent'], cfg['timeout'])
+
+    def acquire(self, cfg):
+        """Pooled session for cfg, or a new one, as (manager, reused)
+
+        The manager is None on connection error."""
+        with self.lock:
+            generation = self.generation
+            entry = self.sessions.pop(self._key(cfg), None)
+        if entry is not None:
+            manager, _ = entry
+            if manager.connected:
+                self.issued[manager] = generation
+                return manager, True
+            self._close(manager)
+
+        manager = NetconfConnection(cfg, self.app).connect()
+        if manager is None:
+            return None, False
+        try:
+            # Keep idle session alive through NAT and firewalls, and let
+            # paramiko notice a dead peer before the next RPC does.  Manager
+            # has no public accessor for the session, session() is a stub
+            manager._session.transport.set_keepalive(SSH_KEEPALIVE)
+        except Exception:
+            # Not handed out, nor pooled, close it here or it leaks
+            self._close(manager)
+            raise
+        self.issued[manager] = generation
+        return manager, False
+
+    def release(self, cfg, manager):
+        """Return session to the pool, unless disconnected or retired"""
+        if not manager.connected:
+            return
+        with self.lock:
+            if self.issued.pop(manager, None) != self.generation:
+                # Handed out before close(), e.g. with old credentials
+                old = (manager,)
+            else:
+                old = self.sessions.get(self._key(cfg))
+                self.sessions[self._key(cfg)] = (manager, time.monotonic())
+        if old is not None:
+            self._close(old[0])
+
+    def expire(self):
+        """Close sessions idle for longer than idle_timeout"""
+        now = time.monotonic()
+        with self.lock:
+            stale = [key for key, (_, last) in self.sessions.items()
+                     if now - last > self.idle_timeout]
+            managers = [self.sessions.pop(key)[0] for key in stale]
+        for manager in managers:
+            self._close(manager)
+
+    def close(self):
+        """Close all pooled sessions, and retire those in use"""
+        with self.lock:
+            self.generation += 1
+            managers = [manager for manager, _ in self.sessions.values()]
+            self.sessions.clear()
+        for manager in managers:
+            self._close(manager)
+
+    @staticmethod
+    def _close(manager):
+        if not manager.connected:
+            return
+        try:
+            manager.close_session()
+            logging.info("Disconnected from NETCONF server")
+        except Exception as err:
+            logging.debug("Failed closing NETCONF session: %s", err)
+
+
 class ZeroconfListener:
+    __slots__ = ('app', 'devices')
+
     def __init__(self, app):
         self.app = app
         self.devices = {}
 
     def add_service(self, zeroconf, type, name):
+        if type != NETCONF_SVC:
+            return
         info = zeroconf.get_service_info(type, name)
         if info:
-            addresses = [socket.inet_ntoa(addr) for addr in info.addresses]
             hostname = info.server if info.server else name
-            for address in addresses:
-                self.devices[name] = (hostname, address, info.port)
+            hostname = hostname.rstrip('.')
+            added = False
+            port = info.port
+            for addr in info.addresses:
+                family = socket.AF_INET if len(addr) == 4 else socket.AF_INET6
+                # Devices keyed by (hostname, address, port), value is the
+                # service name needed by remove_service()
+                key = (hostname, socket.inet_ntop(family, addr), port)
+                if key in self.devices:
+                    continue
+                self.devices[key] = name
+                added = True
 
-            self.app.update_device_list(self.devices)
+            if added:
+                self.app.update_device_list(list(self.devices))
 
     def update_service(self, zeroconf, type, name):
         pass
 
     def remove_service(self, zeroconf, type, name):
-        if name in self.devices:
-            del self.devices[name]
-            self.app.update_device_list(self.devices.values())
+        if type != NETCONF_SVC:
+            return
+        keys = [key for key, svc in self.devices.items() if svc == name]
+        for key in keys:
+            del self.devices[key]
+        if keys:
+            self.app.update_device_list(list(self.devices))
 
 
 class ConfigManager:
-    def __init__(self, filename='.netconf_config.json'):
+    __slots__ = ('filename', 'filepath', 'default_cfg', 'cfg', 'app', 'save_id',
+                 'written')
+
+    def __init__(self, filename='.netconf_config.json', app=None):
         self.filename = filename
+        self.app = app          # Tk main loop for save_debounced()
+        self.save_id = None     # pending save, see save_debounced()
+        self.written = None     # file contents as last read or written
         self.filepath = self._get_file()
         self.default_cfg = {
             'addr': '',
@@ -82,7 +236,8 @@ class ConfigManager:
             'server_path': '',
             'server_port': 8080,
             'syntax_style': 'monokai',
-            'max_highlighting_size': 500_000
+            'max_highlighting_size': 500_000,
+            'pool_idle_timeout': 300
         }
         self.cfg = self.default_cfg.copy()
         self.load()
@@ -92,17 +247,48 @@ class ConfigManager:
         return os.path.join(home_dir, self.filename)
 
     def save(self):
-        with open(self.filepath, 'w') as file:
-            json.dump(self.cfg, file)
+        data = json.dumps(self.cfg).encode('utf-8')
+        if data == self.written:
+            return  # e.g., theme toggled and back again
+        # Write to a temporary file first, a crash mid-write must not
+        # leave a truncated config behind
+        tmp = self.filepath + '.tmp'
+        with open(tmp, 'wb') as file:
+            file.write(data)
+        os.replace(tmp, self.filepath)
+        self.written = data
+
+    def save_debounced(self, delay_ms=500):
+        """Mark config as changed, it is written at most once per delay_ms"""
+        if self.app is None:
+            self.save()
+        elif self.save_id is None:
+            self.save_id = self.app.after(delay_ms, self.flush)
+
+    def flush(self):
+        """Write any pending config change to disk"""
+        if self.save_id is None:
+            return
+        self.app.after_cancel(self.save_id)
+        self.save_id = None
+        self.save()
 
     def load(self):
-        if os.path.exists(self.filepath):
-            with open(self.filepath, 'r') as file:
-                self.cfg = json.load(file)
+        try:
+            with open(self.filepath, 'rb') as file:
+                self.written = file.read()
+            self.cfg = json.loads(self.written.decode('utf-8'))
+        except FileNotFoundError:
+            pass
         # Merge default config with loaded config
         self._merge_defaults()
 
     def _merge_defaults(self):
-        for key, value in self.default_cfg.items():
-            if key not in self.cfg:
-                self.cfg[key] = value
+        # Loaded values take precedence over the defaults
+        self.cfg = {**self.default_cfg, **self.cfg}
+        # Older versions saved port and timeout as typed, as strings
+        for key in ('port', 'timeout'):
+            try:
+                self.cfg[key] = int(self.cfg[key])
+            except (TypeError, ValueError):
+                self.cfg[key] = self.default_cfg[key]
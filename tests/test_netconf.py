@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from ncclient import manager
+from simple_netconf_client.network.Netconf import NetconfSessionPool, SSH_KEEPALIVE
+
+CFG = {
+    'addr': '192.0.2.1',
+    'port': 830,
+    'user': 'admin',
+    'pass': 'admin',
+    'ssh-agent': False,
+    'timeout': 30,
+}
+
+
+def fake_manager():
+    """Real ncclient Manager on a stubbed SSH session"""
+    session = mock.Mock(connected=True)
+    return manager.Manager(session, None)
+
+
+class TestSessionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = NetconfSessionPool(mock.Mock())
+
+    def acquire(self, m):
+        with mock.patch.object(manager, 'connect', return_value=m):
+            return self.pool.acquire(CFG)
+
+    def test_acquire_sets_keepalive(self):
+        m = fake_manager()
+        self.assertEqual(self.acquire(m), (m, False))
+        m._session.transport.set_keepalive.assert_called_once_with(SSH_KEEPALIVE)
+
+    def test_released_session_is_reused(self):
+        m = fake_manager()
+        self.acquire(m)
+        self.pool.release(CFG, m)
+        self.assertEqual(self.pool.acquire(CFG), (m, True))
+
+    def test_failed_setup_closes_session(self):
+        m = fake_manager()
+        m._session.transport.set_keepalive.side_effect = OSError("gone")
+        with mock.patch.object(NetconfSessionPool, '_close') as close:
+            with self.assertRaises(OSError):
+                self.acquire(m)
+        close.assert_called_once_with(m)
+
+    def test_session_in_use_during_close_is_not_pooled(self):
+        m = fake_manager()
+        self.acquire(m)
+        self.pool.close()
+        with mock.patch.object(NetconfSessionPool, '_close') as close:
+            self.pool.release(CFG, m)
+        close.assert_called_once_with(m)
+        self.assertEqual(self.pool.sessions, {})
+
+
+if __name__ == '__main__':
+    unittest.main()